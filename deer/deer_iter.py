@@ -44,7 +44,9 @@ def deer_iteration(
         The function that shifts the input signal.
         It takes the signal of shape (nsamples, ny) and produces a list of shifted signals of shape (nsamples, ny).
     p_num: int
-        Number of how many dependency on values of ``y`` at different places the function ``func`` has
+        Number of how many dependency on values of ``y`` at different places the function ``func`` has.
+        It must be a static Python integer (it is one of the non-differentiable arguments), so the computations
+        over the ``p_num`` shifted signals are specialized when the function is traced.
     params: Any
         The parameters of the function ``func``.
     xinput: Any
@@ -104,10 +106,13 @@ def deer_iteration_helper(
         clip_ytnext: bool = False,
         atol: Optional[float] = None,
         rtol: Optional[float] = None,
-        ) -> Tuple[jnp.ndarray, Optional[List[jnp.ndarray]], Callable]:
-    # obtain the functions to compute the jacobians and the function
-    jacfunc = jax.vmap(jax.jacfwd(func, argnums=0), in_axes=(0, 0, None))
-    func2 = jax.vmap(func, in_axes=(0, 0, None))
+        ) -> Tuple[jnp.ndarray, jnp.ndarray, jnp.ndarray, Callable]:
+    # obtain the function to compute the jacobians together with the function values in one forward pass
+    def func_aux(ylist: List[jnp.ndarray], x: Any, params: Any) -> Tuple[jnp.ndarray, jnp.ndarray]:
+        fy = func(ylist, x, params)
+        return fy, fy
+
+    jacfunc = jax.vmap(jax.jacfwd(func_aux, argnums=0, has_aux=True), in_axes=(0, 0, None))
 
     dtype = yinit_guess.dtype
     # set the tolerance to be 1e-4 if dtype is float32, else 1e-7 for float64
@@ -115,17 +120,18 @@ def deer_iteration_helper(
     atol = (1e-6 if dtype == jnp.float64 else 1e-4) if atol is None else atol
     rtol = (1e-4 if dtype == jnp.float64 else 1e-3) if rtol is None else rtol
 
-    def iter_func(iter_inp: Tuple[jnp.ndarray, jnp.ndarray, jnp.ndarray, List[jnp.ndarray], jnp.ndarray]) \
-            -> Tuple[jnp.ndarray, jnp.ndarray, List[jnp.ndarray], jnp.ndarray]:
-        err, tol, yt, gt_, iiter = iter_inp
+    def iter_func(iter_inp: Tuple[jnp.ndarray, jnp.ndarray, jnp.ndarray, jnp.ndarray]) \
+            -> Tuple[jnp.ndarray, jnp.ndarray, jnp.ndarray, jnp.ndarray]:
+        not_converged, yt, gt_, iiter = iter_inp
         # gt_ is not used, but it is needed to return at the end of scan iteration
         # yt: (nsamples, ny)
         ytparams = shifter_func(yt, shifter_func_params)
-        gts = [-gt for gt in jacfunc(ytparams, xinput, params)]  # [p_num] + (nsamples, ny, ny)
-        # rhs: (nsamples, ny)
-        rhs = func2(ytparams, xinput, params)  # (carry, input, params) see train.py L41
-        rhs += sum([jnp.einsum("...ij,...j->...i", gt, ytp) for gt, ytp in zip(gts, ytparams)])
-        yt_next = inv_lin(gts, rhs, inv_lin_params)  # (nsamples, ny)
+        # jacs: [p_num] + (nsamples, ny, ny), rhs: (nsamples, ny)
+        jacs, rhs = jacfunc(ytparams, xinput, params)  # (carry, input, params) see train.py L41
+        # the G-matrices are kept stacked, so the matrix-vector products below are done in one einsum
+        gts = -jnp.stack(jacs, axis=0)  # (p_num, nsamples, ny, ny)
+        rhs += jnp.einsum("pnij,pnj->ni", gts, jnp.stack(ytparams, axis=0))
+        yt_next = inv_lin([gts[i] for i in range(p_num)], rhs, inv_lin_params)  # (nsamples, ny)
 
         # workaround for rnn
         if clip_ytnext:
@@ -135,26 +141,28 @@ def deer_iteration_helper(
             # jax.debug.print("{iiter}", iiter=iiter)
             # jax.debug.print("gteival: {gteival}", gteival=jnp.max(jnp.abs(jnp.real(jnp.linalg.eigvals(gts[0])))))
 
-        # conditions for convergence checking
+        # conditions for convergence checking, reduced here to a scalar so the carry does not hold err & tol
         err = jnp.abs(yt_next - yt)
         tol = atol + rtol * jnp.abs(yt_next)
+        not_converged = jnp.any(err > tol)
         # jax.debug.print("iiter: {iiter}, err: {err}", iiter=iiter, err=jnp.max(err))
-        return err, tol, yt_next, gts, iiter + 1
+        return not_converged, yt_next, gts, iiter + 1
 
-    def cond_func(iter_inp: Tuple[jnp.ndarray, jnp.ndarray, jnp.ndarray, List[jnp.ndarray], jnp.ndarray]) -> bool:
-        err, tol, _, _, iiter = iter_inp
-        return jnp.logical_and(jnp.any(err > tol), iiter < max_iter)
+    def cond_func(iter_inp: Tuple[jnp.ndarray, jnp.ndarray, jnp.ndarray, jnp.ndarray]) -> bool:
+        not_converged, _, _, iiter = iter_inp
+        return jnp.logical_and(not_converged, iiter < max_iter)
 
-    tol = jnp.zeros_like(yinit_guess, dtype=dtype)
-    err = tol + 1e10  # initial error should be very high
-    gt = jnp.zeros((yinit_guess.shape[0], yinit_guess.shape[-1], yinit_guess.shape[-1]), dtype=dtype)
-    gts = [gt] * p_num
+    not_converged = jnp.array(True)
+    gts = jnp.zeros((p_num, yinit_guess.shape[0], yinit_guess.shape[-1], yinit_guess.shape[-1]), dtype=dtype)
     iiter = jnp.array(0, dtype=jnp.int32)
-    err, tol, yt, gts, iiter = jax.lax.while_loop(cond_func, iter_func, (err, tol, yinit_guess, gts, iiter))
+    not_converged, yt, gts, iiter = jax.lax.while_loop(cond_func, iter_func, (not_converged, yinit_guess, gts, iiter))
     # (err, yt, gts, iiter), _ = jax.lax.scan(scan_func, (err, yinit_guess, gts, iiter), None, length=max_iter)
     is_converged = iiter < max_iter
     return yt, is_converged, gts, func
 
+# the JVP rule is obtained from the implicit function theorem at the converged solution, so the while_loop
+# is never differentiated and reverse-mode (obtained by JAX transposing this rule) does not store the iterations.
+# custom_jvp is kept instead of custom_vjp so that forward-mode derivatives are still available.
 @deer_iteration.defjvp
 def deer_iteration_jvp(
         # collect non-gradable inputs first
@@ -192,16 +200,18 @@ def deer_iteration_jvp(
     func2 = jax.vmap(func, in_axes=(0, 0, None))  # vmap for y & x
 
     ytparams = shifter_func(yt, shifter_func_params)
-    # gts: [p_num] + (nsamples, ny, ny)
+    # gts: (p_num, nsamples, ny, ny)
 
     # compute df (grad_func)
     func2_params_xinput = partial(func2, ytparams)
-    _, grad_func = jax.jvp(func2_params_xinput, (xinput, params), (grad_xinput, grad_params))
+    _, func2_lin = jax.linearize(func2_params_xinput, xinput, params)
+    grad_func = func2_lin(grad_xinput, grad_params)
 
     # apply L_G^{-1} to the df
     rhs0 = jnp.zeros_like(gts[0][..., 0])  # (nsamples, ny)
-    inv_lin2 = partial(inv_lin, gts)
-    _, grad_yt = jax.jvp(inv_lin2, (rhs0, inv_lin_params), (grad_func, grad_inv_lin_params))
+    inv_lin2 = partial(inv_lin, [gts[i] for i in range(p_num)])
+    _, inv_lin2_lin = jax.linearize(inv_lin2, rhs0, inv_lin_params)
+    grad_yt = inv_lin2_lin(grad_func, grad_inv_lin_params)
 
     result = Result(yt, success=is_converged)
     grad_result = Result(grad_yt)
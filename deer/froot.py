@@ -73,10 +73,14 @@ def newton_iter_helper(func: Callable[[jnp.ndarray, Any], jnp.ndarray],
                        atol: float = 1e-6,
                        rtol: float = 1e-3) -> Result:
 
+    def func_aux(y, params):
+        # return the function value as the auxiliary output to get it from the jacobian pass
+        fy = func(y, params)
+        return fy, fy
+
     def iter_func(carry):
         y, err, tol, iiter, jac0 = carry
-        jac = jax.jacfwd(func)(y, params)
-        fy = func(y, params)
+        jac, fy = jax.jacfwd(func_aux, has_aux=True)(y, params)
         jacinvfy = jnp.linalg.solve(jac, fy)
         # doing lstsq to handle singular matrix
         jacinvfy = jax.lax.cond(jnp.all(jnp.isfinite(jacinvfy)), lambda : jacinvfy, lambda : jnp.linalg.lstsq(jac, fy)[0])
@@ -215,8 +215,32 @@ class BwdEulerDEER(SolveIDAEMethod):
         y0, = inv_lin_params  # tpts: (nsamples,), y0: (ny,)
 
         # using index [1:] because we don't need to compute y_0 again (it's already available from y0)
-        M01 = M0[1:]
-        M0invM1 = -jax.vmap(jnp.linalg.solve)(M01, M1[1:])
-        M0invz = jax.vmap(jnp.linalg.solve)(M01, z[1:])
+        # solve for both right hand sides at once to share the factorization of M0
+        ny = M0.shape[-1]
+        rhs_stack = jnp.concatenate((-M1[1:], z[1:, :, None]), axis=-1)  # (nsamples - 1, ny, ny + 1)
+        sol = _small_solve(M0[1:], rhs_stack)  # (nsamples - 1, ny, ny + 1)
+        M0invM1 = sol[..., :ny]  # (nsamples - 1, ny, ny)
+        M0invz = sol[..., ny]  # (nsamples - 1, ny)
         y = matmul_recursive(M0invM1, M0invz, y0)  # (nsamples, ny)
         return y
+
+def _small_solve(mat: jnp.ndarray, rhs: jnp.ndarray) -> jnp.ndarray:
+    # solve mat @ x = rhs for batched matrices, mat: (..., ny, ny), rhs: (..., ny, nrhs)
+    # for ny <= 3, the inverse is written explicitly with the adjugate formula to avoid the LU overhead,
+    # otherwise it falls back to jnp.linalg.solve
+    ny = mat.shape[-1]
+    if ny == 1:
+        return rhs / mat
+    elif ny == 2:
+        a, b = mat[..., 0, 0], mat[..., 0, 1]
+        c, d = mat[..., 1, 0], mat[..., 1, 1]
+        adj = jnp.stack((jnp.stack((d, -b), axis=-1), jnp.stack((-c, a), axis=-1)), axis=-2)  # (..., 2, 2)
+        det = a * d - b * c  # (...)
+    elif ny == 3:
+        r0, r1, r2 = mat[..., 0, :], mat[..., 1, :], mat[..., 2, :]
+        # the columns of the adjugate are the cross products of the rows
+        adj = jnp.stack((jnp.cross(r1, r2), jnp.cross(r2, r0), jnp.cross(r0, r1)), axis=-1)  # (..., 3, 3)
+        det = jnp.sum(r0 * adj[..., :, 0], axis=-1)  # (...)
+    else:
+        return jnp.linalg.solve(mat, rhs)
+    return (adj @ rhs) / det[..., None, None]
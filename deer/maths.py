@@ -34,17 +34,15 @@ def matmul_recursive(mats: jnp.ndarray, vecs: jnp.ndarray, y0: jnp.ndarray) -> j
     result: jnp.ndarray
         The result of the matrix multiplication, shape ``(nsamples, ny)``, including ``y0`` at the beginning.
     """
-    # shift the elements by one index
-    eye = jnp.eye(mats.shape[-1], dtype=mats.dtype)[None]  # (1, ny, ny)
-    first_elem = jnp.concatenate((eye, mats), axis=0)  # (nsamples, ny, ny)
-    second_elem = jnp.concatenate((y0[None], vecs), axis=0)  # (nsamples, ny)
+    # fold y0 into the first element, so the scan gives y[1:] directly without prepending an identity matrix
+    vecs = vecs.at[:1].add(jnp.einsum("...ij,j->...i", mats[:1], y0))  # (nsamples - 1, ny)
 
     # perform the scan
-    elems = (first_elem, second_elem)
+    elems = (mats, vecs)
     # _, yt = jax.lax.associative_scan(scan_binop, elems)
     _, yt = associative_scan(scan_binop, elems)
     # jax.debug.print("{nan} {inf}", nan=jnp.any(jnp.isnan(yt)), inf=jnp.any(jnp.isinf(yt)))
-    return yt  # (nsamples, ny)
+    return jnp.concatenate((y0[None], yt), axis=0)  # (nsamples, ny)
 
 def associative_scan(fn: Callable, elems, reverse: bool = False, axis: int = 0):
     # associative_scan from jax's source code, but change the slice_in_dim to direct indexing
@@ -8,6 +8,7 @@ import jax.numpy as jnp
 import numpy as np
 from scipy.integrate import solve_ivp as solve_ivp_scipy
 from deer.maths import matmul_recursive
+from deer.fsolve_idae import _small_solve
 from deer import solve_ivp, solve_idae, seq1d, root
 
 
@@ -34,6 +35,21 @@ def test_matmul_recursive():
     result2 = matmul_recursive(mats, vecs, y0)
     assert jnp.allclose(result, result2)
 
+@pytest.mark.parametrize("ny", [1, 2, 3, 4])
+def test_small_solve(ny):
+    nsamples = 100
+    nrhs = ny + 1
+
+    # generate random well-conditioned matrices with shape (nsamples, ny, ny)
+    key = jax.random.PRNGKey(0)
+    subkey1, subkey2 = jax.random.split(key, 2)
+    mats = jax.random.normal(subkey1, (nsamples, ny, ny), dtype=jnp.float64) / 3 + jnp.eye(ny, dtype=jnp.float64)
+    rhs = jax.random.normal(subkey2, (nsamples, ny, nrhs), dtype=jnp.float64)
+
+    result = jnp.linalg.solve(mats, rhs)
+    result2 = _small_solve(mats, rhs)
+    assert jnp.allclose(result, result2)
+
 @pytest.mark.parametrize("method", [
     solve_ivp.DEER()
 ])